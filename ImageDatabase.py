@@ -8,6 +8,10 @@ import re
 # Global variable to store selected folder
 selected_folder = ""
 
+# Query patterns, compiled once at import
+FIELD_PATTERN = re.compile(r'(\w+)\s*:\s*"([^"]+)"|(\w+)\s*:\s*([\S]+)', re.IGNORECASE)  # Matches field:value or field:"value"
+LOGICAL_PATTERN = re.compile(r'\b(AND|OR|NOT)\b', re.IGNORECASE)  # Matches logical operators
+
 # Function to extract metadata from an image
 def extract_metadata(image_path):
     try:
@@ -38,9 +42,7 @@ def parse_query(query):
     Example:
     'Copyright: John Doe AND ISO: 1600' -> [('Copyright', 'John Doe'), 'AND', ('ISO', '1600')]
     """
-    field_pattern = r'(\w+)\s*:\s*"([^"]+)"|(\w+)\s*:\s*([\S]+)'  # Matches field:value or field:"value"
-    logical_pattern = r'\b(AND|OR|NOT)\b'  # Matches logical operators
-    matches = re.findall(field_pattern, query, re.IGNORECASE)
+    matches = FIELD_PATTERN.findall(query)
 
     parsed_terms = []
     for match in matches:
@@ -49,14 +51,19 @@ def parse_query(query):
         parsed_terms.append((field.lower(), wildcard_to_regex(value.lower())))
 
     # Find logical operators
-    operators = re.findall(logical_pattern, query, re.IGNORECASE)
+    operators = LOGICAL_PATTERN.findall(query)
 
     return parsed_terms, operators
 
+# Function to parse a query once per search, compiling each field pattern
+def compile_query(query):
+    parsed_terms, operators = parse_query(query)
+    return [(field, re.compile(pattern)) for field, pattern in parsed_terms], operators
+
 # Function to evaluate complex field-specific search queries
-def match_search_terms(metadata, query):
+def match_search_terms(metadata, compiled_query):
     metadata = {k.lower(): v.lower() for k, v in metadata.items()}  # Normalize metadata keys/values
-    parsed_terms, operators = parse_query(query)
+    parsed_terms, operators = compiled_query
 
     if not parsed_terms:
         return False  # No valid search terms found
@@ -65,7 +72,7 @@ def match_search_terms(metadata, query):
     
     for field, pattern in parsed_terms:
         if field in metadata:
-            match_found = re.search(pattern, metadata[field]) is not None
+            match_found = pattern.search(metadata[field]) is not None
         else:
             match_found = False  # Field not in metadata
 
@@ -96,7 +103,7 @@ def search_metadata():
         folder_label.config(text="Please choose a folder first!", foreground="red")
         return
 
-    search_query = search_entry.get().strip()
+    search_query = compile_query(search_entry.get().strip())  # Parsed once, reused for every image
     results_list.delete(0, tk.END)  # Clear previous results
     global image_matches
     image_matches = []  # Store image paths for reference
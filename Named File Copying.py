@@ -38,6 +38,16 @@ def show_missing_popup(missing):
     tk.Button(popup, text="Close", command=popup.destroy).pack(pady=5)
 
 
+def index_files(source):
+    """Map each lower-cased file name under source to its first path, in os.walk order."""
+    index = {}
+    # os.walk already uses scandir and skips unreadable directories
+    for root, _, files in os.walk(source):
+        for f in files:
+            index.setdefault(f.lower(), os.path.join(root, f))
+    return index
+
+
 def copy_files():
     filenames = [f.strip() for f in text_box.get("1.0", tk.END).splitlines() if f.strip()]
     if not filenames:
@@ -57,20 +67,15 @@ def copy_files():
     copied = 0
     missing = []
 
+    # walk the source tree once instead of once per requested name
+    index = index_files(source)
     for name in filenames:
-        found = False
-        for root_dir, _, files in os.walk(source):
-            for fname in files:
-                if fname.lower() == name.lower():
-                    src_path = os.path.join(root_dir, fname)
-                    shutil.copy2(src_path, os.path.join(dest, fname))
-                    copied += 1
-                    found = True
-                    break
-            if found:
-                break
-        if not found:
+        src_path = index.get(name.lower())
+        if src_path is None:
             missing.append(name)
+            continue
+        shutil.copy2(src_path, os.path.join(dest, os.path.basename(src_path)))
+        copied += 1
 
     if missing:
         show_missing_popup(missing)
@@ -26,6 +26,16 @@ def list_all_files(path):
         }
 
 
+def sha256_file(f):
+    # file_digest (3.11+) runs the read/update loop in C; chunk manually otherwise
+    if hasattr(hashlib, "file_digest"):
+        return hashlib.file_digest(f, "sha256").hexdigest()
+    h = hashlib.sha256()
+    while chunk := f.read(1 << 20):
+        h.update(chunk)
+    return h.hexdigest()
+
+
 def calculate_hashes(base, file_list, is_archive, progress_callback=None):
     hashes = {}
     total = len(file_list)
@@ -33,10 +43,10 @@ def calculate_hashes(base, file_list, is_archive, progress_callback=None):
     def hash_file_from_disk(rel_path):
         full_path = os.path.join(base, rel_path)
         with open(full_path, 'rb') as f:
-            return rel_path, hashlib.sha256(f.read()).hexdigest()
+            return rel_path, sha256_file(f)
 
     def hash_file_from_archive(rel_path, filedata):
-        return rel_path, hashlib.sha256(filedata.read()).hexdigest()
+        return rel_path, sha256_file(filedata)
 
     if is_archive:
         with py7zr.SevenZipFile(base, mode='r') as archive:
@@ -146,10 +156,9 @@ class CompareApp:
         lb2 = tk.Listbox(w, selectmode=tk.MULTIPLE, width=60, height=20)
         lb1.grid(row=2, column=0, padx=5, pady=5)
         lb2.grid(row=2, column=1, padx=5, pady=5)
-        for f in sorted(only1):
-            lb1.insert(tk.END, f)
-        for f in sorted(only2):
-            lb2.insert(tk.END, f)
+        # one Tcl call per listbox rather than one per file
+        lb1.insert(tk.END, *sorted(only1))
+        lb2.insert(tk.END, *sorted(only2))
 
         tk.Button(w, text="Select All", command=lambda: lb1.select_set(0, tk.END)).grid(row=3, column=0)
         tk.Button(w, text="Select All", command=lambda: lb2.select_set(0, tk.END)).grid(row=3, column=1)
@@ -22,6 +22,7 @@ def check_files():
         return
 
     file_names = [name.strip() for name in file_list_text.splitlines() if name.strip()]
+    wanted = set(file_names)  # O(1) membership for every file walked
 
     found_files = {}
     missing_files = []
@@ -30,7 +31,7 @@ def check_files():
     # Search for files
     for root, dirs, files in os.walk(directory):
         for f in files:
-            if f in file_names:
+            if f in wanted:
                 full_path = os.path.join(root, f)
                 if f in found_files:
                     # Duplicate found
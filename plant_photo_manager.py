@@ -9,11 +9,18 @@ Dependencies:
 
 import os
 import shutil
+import concurrent.futures
+import threading
+import atexit
 import sqlite3
 import hashlib
 import csv
+import json
 import datetime
 import re
+import bisect
+import functools
+from contextlib import contextmanager
 import tkinter as tk
 from tkinter import ttk, filedialog, messagebox
 from PIL import Image, ImageTk
@@ -21,7 +28,7 @@ from PIL.ExifTags import TAGS
 import sys
 import platform
 import subprocess
-from tkinterdnd2 import DND_FILES, TkinterDnD
+from tkinterdnd2 import TkinterDnD
 # -------------------------
 # Configuration / Folders
 # -------------------------
@@ -41,9 +48,8 @@ def select_db_file():
     Falls back to DEFAULT_DB_FILE if canceled.
     """
     try:
-        from tkinter import filedialog, Tk
         # hide root window
-        root = Tk()
+        root = tk.Tk()
         root.withdraw()
         path = filedialog.askopenfilename(
             title="Select Plant Photo Database",
@@ -66,97 +72,258 @@ os.makedirs(RAW_DIR, exist_ok=True)
 # -------------------------
 # Database
 # -------------------------
-def init_db():
-    conn = sqlite3.connect(DB_FILE)
-    c = conn.cursor()
-    # Main photos table
-    c.execute('''
-        CREATE TABLE IF NOT EXISTS photos (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            species TEXT,
-            species_code TEXT,
-            gfib_link TEXT,
-            main_feature TEXT,
-            feature_code TEXT,
-            date_taken TEXT,
-            used_topaz INTEGER,
-            subject_size TEXT,
-            other_features TEXT,
-            location TEXT,
-            location_code TEXT,
-            processed_filename TEXT,
-            processed_path TEXT,
-            raw_attached INTEGER,
-            raw_paths TEXT,
-            raw_mode TEXT,
-            created_at TEXT
-        )
-    ''')
-    # Feature mappings
-    c.execute('''
-        CREATE TABLE IF NOT EXISTS feature_mappings (
-            specific_feature TEXT PRIMARY KEY,
-            broad_category TEXT NOT NULL
-        )
-    ''')
-    # Location mappings
-    c.execute('''
-        CREATE TABLE IF NOT EXISTS location_mappings (
-            specific_location TEXT PRIMARY KEY,
-            broad_category TEXT NOT NULL
-        )
-    ''')
-    conn.commit()
-    conn.close()
+SCHEMA_DDL = '''
+    CREATE TABLE IF NOT EXISTS photos (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        species TEXT,
+        species_code TEXT,
+        gfib_link TEXT,
+        main_feature TEXT,
+        feature_code TEXT,
+        date_taken TEXT,
+        used_topaz INTEGER,
+        subject_size TEXT,
+        other_features TEXT,
+        location TEXT,
+        location_code TEXT,
+        processed_filename TEXT,
+        processed_path TEXT,
+        raw_attached INTEGER,
+        raw_paths TEXT,
+        raw_mode TEXT,
+        created_at TEXT,
+        dhash TEXT
+    );
+    -- Feature mappings
+    CREATE TABLE IF NOT EXISTS feature_mappings (
+        specific_feature TEXT PRIMARY KEY,
+        broad_category TEXT NOT NULL
+    );
+    -- Location mappings
+    CREATE TABLE IF NOT EXISTS location_mappings (
+        specific_location TEXT PRIMARY KEY,
+        broad_category TEXT NOT NULL
+    );
+    -- Lookups used by autocomplete and search
+    CREATE INDEX IF NOT EXISTS idx_photos_species ON photos(species);
+    CREATE INDEX IF NOT EXISTS idx_photos_main_feature ON photos(main_feature);
+    CREATE INDEX IF NOT EXISTS idx_photos_date_taken ON photos(date_taken);
+    -- LIKE is case-insensitive, so its prefix optimisation needs a NOCASE index
+    CREATE INDEX IF NOT EXISTS idx_photos_species_nocase ON photos(species COLLATE NOCASE);
+    CREATE INDEX IF NOT EXISTS idx_photos_main_feature_nocase ON photos(main_feature COLLATE NOCASE);
+    -- Topaz-only searches narrowed by date, and the newest-first database view
+    CREATE INDEX IF NOT EXISTS idx_photos_topaz_date ON photos(used_topaz, date_taken);
+    CREATE INDEX IF NOT EXISTS idx_photos_created_at ON photos(created_at DESC);
+'''
+# Every object SCHEMA_DDL creates, used to skip the script on an up-to-date DB
+SCHEMA_OBJECTS = {
+    "photos", "feature_mappings", "location_mappings",
+    "idx_photos_species", "idx_photos_main_feature", "idx_photos_date_taken",
+    "idx_photos_species_nocase", "idx_photos_main_feature_nocase",
+    "idx_photos_topaz_date", "idx_photos_created_at",
+}
+# Trigram full-text mirror of photos.other_features, kept in sync by triggers.
+# Trigram tokens give substring matches, so MATCH can stand in for LIKE '%x%'.
+FTS_DDL = '''
+    CREATE VIRTUAL TABLE IF NOT EXISTS photos_fts USING fts5(
+        other_features, content='photos', content_rowid='id', tokenize='trigram'
+    );
+    CREATE TRIGGER IF NOT EXISTS photos_fts_ai AFTER INSERT ON photos BEGIN
+        INSERT INTO photos_fts(rowid, other_features) VALUES (new.id, new.other_features);
+    END;
+    CREATE TRIGGER IF NOT EXISTS photos_fts_ad AFTER DELETE ON photos BEGIN
+        INSERT INTO photos_fts(photos_fts, rowid, other_features) VALUES ('delete', old.id, old.other_features);
+    END;
+    CREATE TRIGGER IF NOT EXISTS photos_fts_au AFTER UPDATE OF other_features ON photos BEGIN
+        INSERT INTO photos_fts(photos_fts, rowid, other_features) VALUES ('delete', old.id, old.other_features);
+        INSERT INTO photos_fts(rowid, other_features) VALUES (new.id, new.other_features);
+    END;
+    INSERT INTO photos_fts(photos_fts) VALUES ('rebuild');
+'''
+FTS_OBJECTS = {"photos_fts", "photos_fts_ai", "photos_fts_ad", "photos_fts_au"}
+# Trigram MATCH needs at least this many characters; shorter terms use LIKE
+FTS_MIN_TERM = 3
+# Columns added after the first release: (name, declaration)
+PHOTO_MIGRATIONS = [("dhash", "TEXT")]
+
+def schema_bootstrap(conn):
+    """Create whatever part of the schema is missing; one SELECT when nothing is."""
+    existing = {r[0] for r in conn.execute("SELECT name FROM sqlite_master")}
+    if SCHEMA_OBJECTS - existing:
+        if "photos" in existing:
+            cols = {r[1] for r in conn.execute("PRAGMA table_info(photos)")}
+            for name, decl in PHOTO_MIGRATIONS:
+                if name not in cols:
+                    conn.execute(f"ALTER TABLE photos ADD COLUMN {name} {decl}")
+        if "photos" not in existing:
+            # new file: free pages are reclaimed in chunks by vacuum_db, not full rewrites
+            # (auto_vacuum only takes effect if set before the first table is created)
+            conn.execute("PRAGMA auto_vacuum=INCREMENTAL")
+        conn.executescript(SCHEMA_DDL)
+        # fresh statistics so the planner considers the new indexes
+        conn.execute("ANALYZE")
+        conn.commit()
+    if FTS_OBJECTS - existing:
+        try:
+            conn.executescript(FTS_DDL)
+            conn.commit()
+        except sqlite3.OperationalError:
+            # SQLite built without FTS5/trigram: free-text search falls back to LIKE
+            conn.rollback()
+
+def has_fts(conn):
+    """Return True if the photos_fts full-text table is available."""
+    return conn.execute("SELECT 1 FROM sqlite_master WHERE name='photos_fts'").fetchone() is not None
+
+# Insertable photos columns, in the order used for every INSERT; a stable
+# SQL string keeps sqlite3's statement cache hitting
+PHOTO_COLS = (
+    "species", "species_code", "gfib_link", "main_feature", "feature_code", "date_taken",
+    "used_topaz", "subject_size", "other_features", "location", "location_code",
+    "processed_filename", "processed_path", "raw_attached", "raw_paths", "raw_mode", "created_at",
+    "dhash",
+)
+_INSERT_PHOTO_SQL = f"INSERT INTO photos ({', '.join(PHOTO_COLS)}) VALUES ({', '.join('?' * len(PHOTO_COLS))})"
+
+# Columns shown in the search results and database view trees
+RESULT_COLS = ("id", "species", "date_taken", "main_feature", "used_topaz", "processed_filename", "raw_attached", "raw_mode")
+RESULT_COL_WIDTHS = {"id":60, "species":160, "date_taken":100, "main_feature":120, "used_topaz":80, "processed_filename":260, "raw_attached":100, "raw_mode":100}
+
+# Fixed query text, built once so sqlite3's statement cache is reused
+SQL_SEARCH_BASE = f"SELECT {', '.join(RESULT_COLS)} FROM photos"
+# Filter shared by search and export, built cheapest-first: the topaz flag and the
+# date and prefix ranges below, then the LIKE/FTS guards. Unused guards are bound
+# as None and short-circuit before any pattern is evaluated, so every search
+# shape shares a few cached statements.
+SQL_SEARCH_WHERE = " WHERE 1=1"
+# Appended only when set, like the date bounds, so idx_photos_topaz_date can seek
+SQL_TOPAZ_ONLY = " AND used_topaz = 1"
+SQL_SEARCH_LIKES = (
+    " AND (:sp IS NULL OR species LIKE '%' || :sp || '%')"
+    " AND (:fp IS NULL OR main_feature LIKE '%' || :fp || '%')"
+    " AND (:ot IS NULL OR other_features LIKE '%' || :ot || '%')"
+)
+SQL_SEARCH_LIKES_FTS = SQL_SEARCH_LIKES + (
+    " AND (:fts IS NULL OR id IN (SELECT rowid FROM photos_fts WHERE photos_fts MATCH :fts))"
+)
+# Date bounds are appended only when set: a bare half-open range on the ISO
+# date_taken text is an index range seek, which an OR guard or date() would prevent
+SQL_DATE_FROM = " AND date_taken >= :df"
+SQL_DATE_TO = " AND date_taken < :dt_end"
+# Species/feature input ending in '*' asks for a case-insensitive starts-with match,
+# served as a NOCASE range seek; anything else uses the substring LIKE guard
+SQL_SPECIES_PREFIX = " AND species >= :sp_lo COLLATE NOCASE AND species < :sp_hi COLLATE NOCASE"
+SQL_FEATURE_PREFIX = " AND main_feature >= :fp_lo COLLATE NOCASE AND main_feature < :fp_hi COLLATE NOCASE"
+SQL_SEARCH_PAGE = " ORDER BY date_taken DESC, id DESC LIMIT :limit OFFSET :offset"
+SEARCH_PAGE_SIZE = 500
+# Stable CSV export schema: explicit columns (no SELECT *), without the internal dhash
+EXPORT_COLS = ("id",) + tuple(c for c in PHOTO_COLS if c != "dhash")
+SQL_EXPORT_BASE = f"SELECT {', '.join(EXPORT_COLS)} FROM photos"
+EXPORT_BATCH = 1000
+EXPORT_BUFFER = 1 << 20
+# newest first, walked page by page down idx_photos_created_at
+SQL_DB_VIEW = f"SELECT {', '.join(RESULT_COLS)} FROM photos ORDER BY created_at DESC LIMIT ? OFFSET ?"
+DB_VIEW_PAGE_SIZE = 200
+# Free pages released per "Compact DB" click
+VACUUM_PAGES = 1000
+# Per-connection tuning, applied once with executescript
+CONN_PRAGMAS = """
+    PRAGMA journal_mode=WAL;
+    PRAGMA synchronous=NORMAL;
+    PRAGMA temp_store=MEMORY;
+    PRAGMA mmap_size=268435456;
+    PRAGMA cache_size=-65536;
+"""
+# id -> processed_path for a batch of ids; {marks} is one "?" per id
+SQL_GET_PROCESSED_PATHS = "SELECT id, processed_path FROM photos WHERE id IN ({marks})"
+PROCESSED_PATH_CACHE_SIZE = 256
+SQL_GET_RAW_PATHS = "SELECT raw_paths, raw_mode FROM photos WHERE id=?"
+SQL_SIMILAR_CANDIDATES = "SELECT processed_filename, dhash FROM photos WHERE dhash IS NOT NULL"
+
+# Add-form variable -> distinct previous values (photos values plus mapping-table
+# specifics), deduplicated and sorted in one statement
+_PREV_VALUES_SQL = "SELECT DISTINCT {0} FROM photos WHERE {0} IS NOT NULL AND {0} != ''"
+SQL_PREVIOUS_VALUES = {
+    "species_var": _PREV_VALUES_SQL.format("species") + " ORDER BY 1",
+    "feature_var": _PREV_VALUES_SQL.format("main_feature")
+        + " UNION SELECT specific_feature FROM feature_mappings WHERE specific_feature != '' ORDER BY 1",
+    "size_var": _PREV_VALUES_SQL.format("subject_size") + " ORDER BY 1",
+    "other_var": _PREV_VALUES_SQL.format("other_features") + " ORDER BY 1",
+    "loc_var": _PREV_VALUES_SQL.format("location")
+        + " UNION SELECT specific_location FROM location_mappings WHERE specific_location != '' ORDER BY 1",
+}
 
 # -------------------------
 # Compact Code Generators
 # -------------------------
 VOWELS = set("AEIOUaeiou")
+_NON_ALPHA_RE = re.compile(r'[^A-Za-z]')
+_BAD_FNAME_RE = re.compile(r'[^A-Za-z0-9._-]')
 
 def safe_code(s, length=4):
     """Make a short code from a species or location string."""
-    if not s:
-        return ("X" * length)[:length]
-    s = re.sub(r'[^A-Za-z]', '', s)
-    if not s:
-        return ("X" * length)[:length]
-    # Prefer consonants first
+    s = _NON_ALPHA_RE.sub('', s or "")
+    # Prefer consonants first; empty input pads out to all "X"
     consonants = "".join([c for c in s if c not in VOWELS])
-    if len(consonants) >= length:
-        return consonants[:length].upper()
-    combined = consonants + "".join([c for c in s if c in VOWELS])
-    return (combined[:length].upper()).ljust(length, "X")
+    vowels = "".join([c for c in s if c in VOWELS])
+    return (consonants + vowels)[:length].upper().ljust(length, "X")
 
 # -------------------------
 # Feature and Location Code Helpers with DB
 # -------------------------
 
+# Default broad categories -> codes
+FEATURE_DEFAULTS = {
+    "flower": "FLW",
+    "leaf": "LEF",
+    "root": "ROT",
+    "inflorescence": "INF",
+    "habit": "HBT",
+    "fruit": "FRT",
+    "seed": "SED",
+    "spike": "SPK",
+    "bulb": "BLB",
+    "pseudobulb": "PSB",
+    "rhizome": "RHZ",
+    "stem": "STM",
+    "petiole": "PTL"
+}
+
+LOCATION_DEFAULTS = {
+    "greenhouse": "GH",
+    "lab": "LB",
+    "garden": "GD",
+    "wild": "WL",
+    "mountain": "MT",
+    "forest": "FR",
+    "indoor": "IN",
+    "nursery": "NY",
+    "field": "FD"
+}
+
+# Specific -> broad category, filled from the mapping tables by load_specific_mappings()
+FEATURE_MAP = {}
+LOCATION_MAP = {}
+
+def load_specific_mappings(db_conn):
+    """Load feature_mappings/location_mappings into FEATURE_MAP and LOCATION_MAP."""
+    cur = db_conn.cursor()
+    cur.row_factory = None  # plain tuples; dict() consumes the cursor directly
+    features = dict(cur.execute("SELECT specific_feature, broad_category FROM feature_mappings"))
+    locations = dict(cur.execute("SELECT specific_location, broad_category FROM location_mappings"))
+    FEATURE_MAP.clear()
+    FEATURE_MAP.update(features)
+    LOCATION_MAP.clear()
+    LOCATION_MAP.update(locations)
+
 def feature_code(feat, db_conn=None):
     """Return 3-letter code using broad category mapping from DB or default mapping."""
     if not feat:
         return "UNK"
     m = feat.strip().lower()
 
-    # Default broad categories
-    default_mapping = {
-        "flower": "FLW",
-        "leaf": "LEF",
-        "root": "ROT",
-        "inflorescence": "INF",
-        "habit": "HBT",
-        "fruit": "FRT",
-        "seed": "SED",
-        "spike": "SPK",
-        "bulb": "BLB",
-        "pseudobulb": "PSB",
-        "rhizome": "RHZ",
-        "stem": "STM",
-        "petiole": "PTL"
-    }
-
     # Try default mapping first
-    for k, v in default_mapping.items():
+    for k, v in FEATURE_DEFAULTS.items():
         if k in m:
             broad = k
             code = v
@@ -165,14 +332,17 @@ def feature_code(feat, db_conn=None):
         broad = None
         code = None
 
-    # Use DB mapping if available
-    if db_conn:
+    # Use specific mapping if available: preloaded map, else the DB
+    specific = FEATURE_MAP.get(m)
+    if specific is None and db_conn:
         cur = db_conn.cursor()
         cur.execute("SELECT broad_category FROM feature_mappings WHERE specific_feature=?", (m,))
         row = cur.fetchone()
         if row:
-            broad = row[0]
-            code = default_mapping.get(broad, "UNK")
+            specific = row[0]
+    if specific is not None:
+        broad = specific
+        code = FEATURE_DEFAULTS.get(broad, "UNK")
 
     # If no mapping found, fallback
     if not code:
@@ -187,33 +357,22 @@ def loc_code(loc, db_conn=None):
         return "XX"
     m = loc.strip().lower()
 
-    # Default mappings
-    default_mapping = {
-        "greenhouse": "GH",
-        "lab": "LB",
-        "garden": "GD",
-        "wild": "WL",
-        "mountain": "MT",
-        "forest": "FR",
-        "indoor": "IN",
-        "nursery": "NY",
-        "field": "FD"
-    }
-
     code = None
-    for k, v in default_mapping.items():
+    for k, v in LOCATION_DEFAULTS.items():
         if k in m:
             code = v
             break
 
-    # Check DB mappings
-    if db_conn:
+    # Check specific mappings: preloaded map, else the DB
+    broad = LOCATION_MAP.get(m)
+    if broad is None and db_conn:
         cur = db_conn.cursor()
         cur.execute("SELECT broad_category FROM location_mappings WHERE specific_location=?", (m,))
         row = cur.fetchone()
         if row:
             broad = row[0]
-            code = default_mapping.get(broad, safe_code(loc, 3))
+    if broad is not None:
+        code = LOCATION_DEFAULTS.get(broad, safe_code(loc, 3))
 
     # Fallback
     if not code:
@@ -221,6 +380,33 @@ def loc_code(loc, db_conn=None):
 
     return code.upper()
 
+@functools.lru_cache(maxsize=128)
+def _decode_thumb(path, mtime, size=THUMB_SIZE):
+    """Decode and downscale an image; safe to run off the Tk thread.
+
+    Cached by (path, mtime, size), so reselecting an unchanged file skips the decode.
+    """
+    with Image.open(path) as img:
+        # JPEGs decode straight at 1/2, 1/4 or 1/8 scale via libjpeg DCT scaling
+        img.draft("RGB", size)
+        img.thumbnail(size, Image.Resampling.BILINEAR, reducing_gap=None)
+        img = img.convert("RGBA")
+        return img.tobytes(), img.size
+
+# Max differing bits for two dHashes to count as the same picture
+DHASH_MAX_DISTANCE = 4
+
+def image_dhash(path):
+    """Return the 64-bit difference hash of an image as 16 hex digits."""
+    with Image.open(path) as img:
+        img.draft("L", (64, 64))
+        px = img.convert("L").resize((9, 8), Image.Resampling.LANCZOS).tobytes()
+    bits = 0
+    for y in range(0, 72, 9):
+        for x in range(y, y + 8):
+            bits = (bits << 1) | (px[x] < px[x + 1])
+    return f"{bits:016x}"
+
 def short_hash(seed: str, chars=4):
     """Return a short hex from sha1 for collision-resistance."""
     h = hashlib.sha1(seed.encode("utf-8")).hexdigest()
@@ -243,7 +429,7 @@ def gen_compact_filename(species, date_taken, main_feature, location, used_topaz
     seed = f"{species}|{date_taken}|{main_feature}|{location}|{original_name}"
     hx = short_hash(seed, chars=4)
     fname = f"{spec_code}-{date_str}-{feat}-{loc}-{ai_flag}-{hx}.jpg"
-    fname = re.sub(r'[^A-Za-z0-9._-]', '', fname)
+    fname = _BAD_FNAME_RE.sub('', fname)
     return fname, spec_code, feat, loc
 
 # -------------------------
@@ -263,6 +449,27 @@ def open_path(path):
     except Exception as e:
         messagebox.showerror("Open failed", str(e))
 
+def copy_file(src, dst):
+    """Copy src to dst with metadata, using an in-kernel copy where the OS supports it."""
+    with open(src, "rb") as fsrc, open(dst, "wb") as fdst:
+        try:
+            remaining = os.fstat(fsrc.fileno()).st_size
+            while remaining > 0:
+                sent = os.copy_file_range(fsrc.fileno(), fdst.fileno(), remaining)
+                if not sent:
+                    # no progress before EOF: unsupported here (FUSE, procfs) or the
+                    # source shrank; redo it as a buffered copy rather than truncate
+                    raise OSError("copy_file_range made no progress")
+                remaining -= sent
+        except (AttributeError, OSError):
+            # no copy_file_range (Windows/macOS) or cross-device: buffered copy
+            fsrc.seek(0)
+            fdst.seek(0)
+            fdst.truncate()
+            shutil.copyfileobj(fsrc, fdst, 1 << 20)
+    shutil.copystat(src, dst)
+    return dst
+
 # -------------------------
 # GUI Application
 # -------------------------
@@ -272,59 +479,62 @@ class PlantPhotoManager(TkinterDnD.Tk):
         self.title("Plant Photo Manager")
         self.geometry("900x600")
 
-        # --- Initialize notebook ---
-        self.notebook = ttk.Notebook(self)
-        self.notebook.pack(fill=tk.BOTH, expand=True)
-
-        # --- Create tabs ---
-        self.create_main_tab()   # Your main tab function
-        self.create_raw_tab()    # The raw files tab with drag-and-drop
-
-        # --- Initialize other components ---
-        self.setup_database()    # Example: database setup
-        self.load_initial_data() # Example: load initial data if needed
-
-        # --- Any other initialization ---
-        # self.some_other_setup()
-
-    def create_raw_tab(self):
-        """
-        Create the Raw Files tab in the notebook and prepare it for drag-and-drop.
-        """
-        if not hasattr(self, 'notebook'):
-            print("Error: Notebook widget does not exist.")
-            return
-
-        # Create the tab frame
-        self.raw_tab = ttk.Frame(self.notebook)
-        self.notebook.add(self.raw_tab, text="Raw Files")
-
-        # Example content: listbox to show dropped files
-        self.raw_listbox = tk.Listbox(self.raw_tab, width=80, height=20)
-        self.raw_listbox.pack(fill=tk.BOTH, expand=True, padx=5, pady=5)
-
-        # Enable drag-and-drop now that the tab exists
-        self.enable_drag_and_drop()
+        # Shared connection in autocommit mode; group writes with self._tx().
+        # Rows are sqlite3.Row, so callers read columns by name. Only the Tk thread
+        # uses it; worker threads (export, mapping load) open their own connections.
+        self.conn = sqlite3.connect(DB_FILE, isolation_level=None)
+        # refresh planner statistics once at exit rather than on any query path
+        atexit.register(self.close_db)
+        self.conn.row_factory = sqlite3.Row
+        self.conn.executescript(CONN_PRAGMAS)
+        self._has_fts = has_fts(self.conn)
+
+        # Thumbnails are decoded on worker threads; PhotoImage is built on the Tk thread
+        # (only the latest selection matters, so stale jobs are cancelled)
+        self._thumb_pool = concurrent.futures.ThreadPoolExecutor(max_workers=2)
+        self._thumb_path = None
+        self._thumb_future = None
+        # save_entry's file copies, one save at a time, off the Tk thread
+        self._copy_pool = concurrent.futures.ThreadPoolExecutor(max_workers=1)
+        # (path, mtime) of the preview currently displayed
+        self._last_preview_key = None
+        # one Tk photo reused for every preview; pasted into rather than reallocated
+        self._thumb_photo = ImageTk.PhotoImage("RGBA", THUMB_SIZE)
+
+        # field name -> sorted prefix index used by setup_autocomplete
+        self._autocomplete_index = {}
+        # photo id -> processed_path, least recently used first
+        self._processed_path_cache = {}
+
+        # --- Build the notebook and its tabs ---
+        self.setup_widgets()
+
+    def close_db(self):
+        """Run PRAGMA optimize and close the shared connection."""
+        try:
+            self.conn.execute("PRAGMA optimize")
+            self.conn.close()
+        except sqlite3.Error:
+            pass
 
-    def enable_drag_and_drop(self):
-        """
-        Enable drag-and-drop support for the raw_tab to accept files.
-        Requires the tkinterdnd2 module.
-        """
+    @contextmanager
+    def _tx(self):
+        """Run the enclosed statements in one explicit transaction."""
+        self.conn.execute("BEGIN IMMEDIATE")
         try:
-            from tkinterdnd2 import DND_FILES
-        except ImportError:
-            print("tkinterdnd2 module not installed; drag-and-drop disabled.")
-            return
+            yield
+            self.conn.execute("COMMIT")
+        except BaseException:
+            self.conn.execute("ROLLBACK")
+            raise
 
-        if hasattr(self, 'raw_tab') and self.raw_tab is not None:
-            self.raw_tab.drop_target_register(DND_FILES)
-            self.raw_tab.dnd_bind('<<Drop>>', self.handle_drop)
-        else:
-            print("Warning: raw_tab does not exist. Drag-and-drop not enabled.")
+    def _insert_photo_rows(self, rows):
+        """Insert photo row dicts (keyed by PHOTO_COLS) in one transaction."""
+        with self._tx():
+            self.conn.executemany(_INSERT_PHOTO_SQL, (tuple(row[c] for c in PHOTO_COLS) for row in rows))
 
     def bulk_add_raw_selection(self, filepaths=None):
-        """Add multiple raw files either via filedialog or drag-and-drop."""
+        """Add multiple raw files, chosen via filedialog unless filepaths is given."""
         if filepaths is None:
             files = filedialog.askopenfilenames(
                 title="Select raw image files",
@@ -336,19 +546,6 @@ class PlantPhotoManager(TkinterDnD.Tk):
         if not files:
             return
 
-        for filepath in files:
-            try:
-                filename = os.path.basename(filepath)
-                species = self.get_species_from_filename(filename)
-                prefix = safe_filename_prefix(species)
-                timestamp = datetime.datetime.now().strftime("%Y%m%d%H%M%S")
-                new_filename = f"{prefix}_{timestamp}_{filename}"
-                dest_path = os.path.join(self.raw_dir, new_filename)
-                shutil.copy2(filepath, dest_path)
-                self.db_insert_raw_file(species, new_filename)
-            except Exception as e:
-                print(f"Error adding file {filepath}: {e}")
-
         # Prompt user for location and subject (applies to all selected files)
         def ask_user_inputs():
             dlg = tk.Toplevel(self)
@@ -361,158 +558,135 @@ class PlantPhotoManager(TkinterDnD.Tk):
             subj_var = tk.StringVar()
             tk.Entry(dlg, textvariable=subj_var).pack(pady=5)
 
-            submitted = tk.BooleanVar(value=False)
+            # values are read once on submit and kept, rather than re-read from Tk afterwards
+            submitted = []
             def submit():
-                if loc_var.get().strip() and subj_var.get().strip():
-                    submitted.set(True)
+                loc, subj = loc_var.get().strip(), subj_var.get().strip()
+                if loc and subj:
+                    submitted.append((loc, subj))
                     dlg.destroy()
                 else:
                     messagebox.showwarning("Missing info", "Please fill both fields.")
 
             tk.Button(dlg, text="Submit", command=submit).pack(pady=10)
             self.wait_window(dlg)
-            if submitted.get():
-                return loc_var.get().strip(), subj_var.get().strip()
-            return None, None
+            return submitted[0] if submitted else (None, None)
 
         location, subject = ask_user_inputs()
         if not location or not subject:
             return
 
-        # Process each selected file
+        # Plan a unique managed name for each file; copies and EXIF reads happen on a
+        # worker thread and the rows are written back on the Tk thread
+        species = "UNKNOWN"
+        prefix = safe_filename_prefix(species)
+        raw_copies = []
+        claimed = set()
         for f in files:
-            # Extract date from EXIF if available
-            date_taken = None
-            try:
-                img = Image.open(f)
-                info = img._getexif() or {}
-                for tag, value in info.items():
-                    decoded = TAGS.get(tag, tag)
-                    if decoded == "DateTimeOriginal":
-                        date_taken = datetime.datetime.strptime(value, "%Y:%m:%d %H:%M:%S").date().isoformat()
-                        break
-            except Exception:
-                pass
-            if not date_taken:
-                date_taken = datetime.date.today().isoformat()
-
-            # Pre-fill standard values for raw-only import
-            species = "UNKNOWN"
-            main_feat = "RAW"
-            used_topaz = 0
+            dest_name = f"{prefix}_{datetime.datetime.now().strftime('%Y%m%d%H%M%S')}_{os.path.basename(f)}"
+            dest_path = os.path.join(RAW_DIR, dest_name)
+            if os.path.exists(dest_path) or dest_path in claimed:
+                base, ext = os.path.splitext(dest_path)
+                c = 1
+                while os.path.exists(f"{base}_{c}{ext}") or f"{base}_{c}{ext}" in claimed:
+                    c += 1
+                dest_path = f"{base}_{c}{ext}"
+            claimed.add(dest_path)
+            raw_copies.append((f, dest_path))
+
+        fut = self._copy_pool.submit(_import_raw_files, raw_copies)
+        fut.add_done_callback(lambda f: self.after(0, self._finish_bulk_import, f, location, subject))
+
+    def _finish_bulk_import(self, fut, location, subject):
+        """Tk thread: record the raw files a bulk import copied."""
+        try:
+            results = fut.result()
+        except Exception as e:
+            messagebox.showerror("Bulk import failed", str(e))
+            return
 
-            # Copy raw into managed RAW_DIR
-            try:
-                bn = os.path.basename(f)
-                dest_name = f"{safe_filename_prefix(species)}_{datetime.datetime.now().strftime('%Y%m%d%H%M%S')}_{bn}"
-                dest_path = os.path.join(RAW_DIR, dest_name)
-                shutil.copy2(f, dest_path)
-                raw_attached = 1
-                raw_mode = "copied"
-            except Exception as e:
-                messagebox.showwarning("Copy failed", f"Failed to copy {f}:\n{e}")
+        # Pre-fill standard values for raw-only import
+        species = "UNKNOWN"
+        main_feat = "RAW"
+        used_topaz = 0
+        rows = []
+        for f, dest_path, date_taken in results:
+            if isinstance(dest_path, Exception):
+                messagebox.showwarning("Copy failed", f"Failed to copy {f}:\n{dest_path}")
                 continue
+            rows.append({
+                "species": species,
+                "species_code": safe_code(species, 4),
+                "gfib_link": "",
+                "main_feature": main_feat,
+                "feature_code": feature_code(main_feat),
+                "date_taken": date_taken or datetime.date.today().isoformat(),
+                "used_topaz": used_topaz,
+                "subject_size": subject,
+                "other_features": "",
+                "location": location,
+                "location_code": loc_code(location),
+                "processed_filename": "",
+                "processed_path": "",  # no processed file
+                "raw_attached": 1,
+                "raw_paths": json.dumps([dest_path]),
+                "raw_mode": "copied",
+                "created_at": datetime.datetime.now().isoformat(),
+                "dhash": None,
+            })
+
+        # Insert into database, all files in one transaction
+        self._insert_photo_rows(rows)
+
+        messagebox.showinfo("Bulk Import Done", f"Added {len(rows)} raw images with auto-filled metadata.")
 
-            # Insert into database
-            conn = sqlite3.connect(DB_FILE)
-            c = conn.cursor()
-            c.execute('''
-                INSERT INTO photos (
-                    species, species_code, gfib_link, main_feature, feature_code, date_taken,
-                    used_topaz, subject_size, other_features, location, location_code,
-                    processed_filename, processed_path, raw_attached, raw_paths, raw_mode, created_at
-                ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-            ''', (
-                species,
-                safe_code(species, 4),
-                "",
-                main_feat,
-                feature_code(main_feat),
-                date_taken,
-                used_topaz,
-                subject,
-                "",
-                location,
-                loc_code(location),
-                "",
-                "",  # no processed file
-                raw_attached,
-                dest_path,
-                raw_mode,
-                datetime.datetime.now().isoformat()
-            ))
-            conn.commit()
-            conn.close()
-
-        messagebox.showinfo("Bulk Import Done", f"Added {len(files)} raw images with auto-filled metadata.")
-   
-        # -------------------------
-    # Fetch previous values for autocomplete
     # -------------------------
-    
-        # -------------------------
     # Fetch previous values / autocomplete
     # -------------------------
     def get_previous_values(self, field):
         """Return a sorted list of distinct previous entries for a given metadata field,
         including specifics from the mapping tables if they exist."""
-        if field not in ("species_var", "feature_var", "size_var", "other_var", "loc_var"):
+        query = SQL_PREVIOUS_VALUES.get(field)
+        if query is None:
             return []
 
-        field_map = {
-            "species_var": "species",
-            "feature_var": "main_feature",
-            "size_var": "subject_size",
-            "other_var": "other_features",
-            "loc_var": "location"
-        }
-        col = field_map.get(field)
-        values = set()
-
         try:
-            conn = sqlite3.connect(DB_FILE)
-            c = conn.cursor()
-
-            # Add values from photos table
-            if col:
-                c.execute(f"SELECT DISTINCT {col} FROM photos WHERE {col} IS NOT NULL AND {col} != ''")
-                values.update(r[0] for r in c.fetchall() if r[0])
-
-            # Add specifics from mappings tables
-            if field == "feature_var":
-                c.execute("SELECT specific_feature FROM feature_mappings")
-                values.update(r[0] for r in c.fetchall() if r[0])
-            elif field == "loc_var":
-                c.execute("SELECT specific_location FROM location_mappings")
-                values.update(r[0] for r in c.fetchall() if r[0])
-
-            conn.close()
+            values = [r[0] for r in self.conn.execute(query)]
         except Exception:
-            pass
+            values = []
 
-        return sorted(values)
+        return values
 
 
     # -------------------------
     # Autocomplete Entry Setup
     # -------------------------
     def setup_autocomplete(self, entry_widget, field_name):
-        """Attach a basic autocomplete to a Tk Entry widget based on previous values."""
-        values = self.get_previous_values(field_name)
-        if not values:
-            return
+        """Attach inline prefix completion to a Tk Entry widget based on previous values."""
+        self._autocomplete_index[field_name] = build_prefix_index(self.get_previous_values(field_name))
 
         def on_key_release(event):
+            # only after a printable character typed at the end of the text; editing
+            # mid-field, modifiers and navigation keys never complete
+            if not event.char or not event.char.isprintable():
+                return
+            end = entry_widget.index("end")
+            if entry_widget.index("insert") != end:
+                return
             typed = entry_widget.get()
-            entry_widget.tk.call("autocomplete::complete", entry_widget._w, typed)
+            matches = prefix_matches(self._autocomplete_index[field_name], typed, limit=1)
+            if matches and len(matches[0]) > len(typed):
+                # append only the missing tail and select it so further typing overwrites it
+                entry_widget.insert("end", matches[0][len(typed):])
+                entry_widget.select_range(end, "end")
+                entry_widget.icursor(end)
 
-        # create a Tcl autocomplete for simplicity
-        self.tk.call("package", "require", "autocomplete")
         entry_widget.bind("<KeyRelease>", on_key_release)
-        entry_widget.tk.call("autocomplete::setList", entry_widget._w, " ".join(values))
 
-    
-        
+    def refresh_autocomplete(self):
+        """Rebuild prefix indexes after the photos table changes."""
+        for field_name in self._autocomplete_index:
+            self._autocomplete_index[field_name] = build_prefix_index(self.get_previous_values(field_name))
 
     def setup_widgets(self):
         notebook = ttk.Notebook(self)
@@ -532,9 +706,6 @@ class PlantPhotoManager(TkinterDnD.Tk):
 
     # ---------------------
     # Add Tab
-    # ---------------------
-        # ---------------------
-    # Add Tab
     # ---------------------
     def build_add_tab(self):
         frm = self.add_frame
@@ -557,6 +728,9 @@ class PlantPhotoManager(TkinterDnD.Tk):
         self.topaz_var = tk.IntVar(value=0)
         self.copy_raw_var = tk.IntVar(value=1)
         self.preview_var = tk.StringVar()
+        # text vars reset together by clear_add_form
+        self._form_text_vars = (self.proc_path_var, self.species_var, self.gfib_var, self.feature_var,
+                                self.date_var, self.size_var, self.other_var, self.loc_var, self.preview_var)
 
         # Top frame: main metadata
         ttk.Label(topfrm, text="Processed Image:").grid(row=0, column=0, sticky="w")
@@ -564,36 +738,48 @@ class PlantPhotoManager(TkinterDnD.Tk):
         ttk.Button(topfrm, text="Browse", command=self.browse_processed).grid(row=0, column=2, padx=4)
 
         ttk.Label(topfrm, text="Species:").grid(row=1, column=0, sticky="w", pady=4)
-        ttk.Entry(topfrm, textvariable=self.species_var, width=20).grid(row=1, column=1, sticky="w", pady=4)
+        species_entry = ttk.Entry(topfrm, textvariable=self.species_var, width=20)
+        species_entry.grid(row=1, column=1, sticky="w", pady=4)
 
         ttk.Label(topfrm, text="GFIB link:").grid(row=1, column=2, sticky="w", pady=4)
         ttk.Entry(topfrm, textvariable=self.gfib_var, width=25).grid(row=1, column=3, sticky="w", pady=4)
 
         ttk.Label(topfrm, text="Feature:").grid(row=2, column=0, sticky="w", pady=4)
-        ttk.Entry(topfrm, textvariable=self.feature_var, width=20).grid(row=2, column=1, sticky="w", pady=4)
+        feature_entry = ttk.Entry(topfrm, textvariable=self.feature_var, width=20)
+        feature_entry.grid(row=2, column=1, sticky="w", pady=4)
 
         ttk.Label(topfrm, text="Date taken (YYYY-MM-DD):").grid(row=2, column=2, sticky="w", pady=4)
         ttk.Entry(topfrm, textvariable=self.date_var, width=15).grid(row=2, column=3, sticky="w", pady=4)
 
         ttk.Label(topfrm, text="Subject size:").grid(row=3, column=0, sticky="w", pady=4)
-        ttk.Entry(topfrm, textvariable=self.size_var, width=20).grid(row=3, column=1, sticky="w", pady=4)
+        size_entry = ttk.Entry(topfrm, textvariable=self.size_var, width=20)
+        size_entry.grid(row=3, column=1, sticky="w", pady=4)
 
         ttk.Label(topfrm, text="Other features:").grid(row=3, column=2, sticky="w", pady=4)
-        ttk.Entry(topfrm, textvariable=self.other_var, width=25).grid(row=3, column=3, sticky="w", pady=4)
+        other_entry = ttk.Entry(topfrm, textvariable=self.other_var, width=25)
+        other_entry.grid(row=3, column=3, sticky="w", pady=4)
 
         ttk.Label(topfrm, text="Location:").grid(row=4, column=0, sticky="w", pady=4)
-        ttk.Entry(topfrm, textvariable=self.loc_var, width=20).grid(row=4, column=1, sticky="w", pady=4)
+        loc_entry = ttk.Entry(topfrm, textvariable=self.loc_var, width=20)
+        loc_entry.grid(row=4, column=1, sticky="w", pady=4)
+
+        # inline completion from previously saved values
+        for entry, field_name in ((species_entry, "species_var"), (feature_entry, "feature_var"),
+                                  (size_entry, "size_var"), (other_entry, "other_var"), (loc_entry, "loc_var")):
+            self.setup_autocomplete(entry, field_name)
 
         ttk.Checkbutton(topfrm, text="Topaz used", variable=self.topaz_var).grid(row=4, column=2, sticky="w", padx=4)
         ttk.Checkbutton(topfrm, text="Copy raw files", variable=self.copy_raw_var).grid(row=4, column=3, sticky="w", padx=4)
 
-        # Mid frame: raw file selection
+        # Mid frame: raw file selection; _raw_set mirrors the listbox for fast dedup
+        self._raw_set = set()
         raw_frame = ttk.LabelFrame(midfrm, text="Raw files")
         raw_frame.pack(fill="both", expand=True, padx=4, pady=4)
 
         self.raw_listbox = tk.Listbox(raw_frame, height=6)
         self.raw_listbox.pack(side="left", fill="both", expand=True, padx=2, pady=2)
-        self.raw_files_text = tk.Text(raw_frame, height=6, width=50)
+        # read-only so its lines stay in step with the listbox rows
+        self.raw_files_text = tk.Text(raw_frame, height=6, width=50, state="disabled")
         self.raw_files_text.pack(side="left", fill="both", expand=True, padx=2, pady=2)
 
         btn_frame = ttk.Frame(raw_frame)
@@ -616,7 +802,8 @@ class PlantPhotoManager(TkinterDnD.Tk):
         self.note_preview = tk.Text(preview_frame, height=5, width=50)
         self.note_preview.pack(fill="both", expand=True, pady=2)
 
-        ttk.Button(bottomfrm, text="Save Entry", command=self.save_entry).pack(side="right", padx=4, pady=4)
+        self.save_btn = ttk.Button(bottomfrm, text="Save Entry", command=self.save_entry)
+        self.save_btn.pack(side="right", padx=4, pady=4)
 
     
     def browse_processed(self):
@@ -637,27 +824,66 @@ class PlantPhotoManager(TkinterDnD.Tk):
     def browse_raw(self):
         ps = filedialog.askopenfilenames(title="Select raw files (can choose multiple)",
                                          filetypes=[("Raw/Images", "*.CR2 *.NEF *.ARW *.dng *.raf *.rw2 *.tif *.tiff *.jpg *.jpeg *.png"), ("All files", "*.*")])
+        new = []
         for p in ps:
-            if p not in self.raw_listbox.get(0, 'end'):
-                self.raw_listbox.insert("end", p)
-                self.raw_files_text.insert("end", p + "\n")
+            if p not in self._raw_set:
+                self._raw_set.add(p)
+                new.append(p)
+        if new:
+            self.raw_listbox.insert("end", *new)
+            self.raw_files_text.config(state="normal")
+            self.raw_files_text.insert("end", "\n".join(new) + "\n")
+            self.raw_files_text.config(state="disabled")
 
     def remove_selected_raw(self):
         sel = self.raw_listbox.curselection()
         if not sel:
             return
+        # listbox row i is text line i+1; delete bottom-up so indices stay valid
+        self.raw_files_text.config(state="normal")
         for i in reversed(sel):
+            self._raw_set.discard(self.raw_listbox.get(i))
             self.raw_listbox.delete(i)
-        self.raw_files_text.delete("1.0", "end")
-        for i in range(self.raw_listbox.size()):
-            self.raw_files_text.insert("end", self.raw_listbox.get(i) + "\n")
+            self.raw_files_text.delete(f"{i + 1}.0", f"{i + 2}.0")
+        self.raw_files_text.config(state="disabled")
 
     def show_thumbnail(self, path):
         try:
-            img = Image.open(path)
-            img.thumbnail(THUMB_SIZE)
-            self.current_thumb = ImageTk.PhotoImage(img)
-            self.thumb_label.configure(image=self.current_thumb, text="")
+            mtime = os.path.getmtime(path)
+        except OSError as e:
+            self.cancel_thumbnail()
+            self._thumb_path = self._last_preview_key = None
+            self.thumb_label.configure(image="", text=f"Preview not available\n{e}")
+            return
+        # same unchanged file already on screen: nothing to decode
+        if (path, mtime) == self._last_preview_key:
+            return
+        self.cancel_thumbnail()
+        self._thumb_path = path
+        self._last_preview_key = None
+        self.thumb_label.configure(image="", text="Loading preview...")
+        fut = self._thumb_future = self._thumb_pool.submit(_decode_thumb, path, mtime, THUMB_SIZE)
+        fut.add_done_callback(lambda f: self.after(0, self._apply_thumb, path, mtime, f))
+
+    def cancel_thumbnail(self):
+        """Drop a queued preview decode that no longer matches the selection."""
+        if self._thumb_future is not None:
+            self._thumb_future.cancel()
+            self._thumb_future = None
+
+    def _apply_thumb(self, path, mtime, fut):
+        # ignore results for images that are no longer selected
+        if fut.cancelled() or path != self._thumb_path:
+            return
+        try:
+            data, size = fut.result()
+            # paste() needs a full-size image, so centre the thumbnail on a clear canvas
+            canvas = Image.new("RGBA", THUMB_SIZE, (0, 0, 0, 0))
+            canvas.paste(Image.frombytes("RGBA", size, data),
+                         ((THUMB_SIZE[0] - size[0]) // 2, (THUMB_SIZE[1] - size[1]) // 2))
+            self._thumb_photo.paste(canvas)
+            self.thumb_label.configure(image=self._thumb_photo, text="")
+            self._last_preview_key = (path, mtime)
         except Exception as e:
             self.thumb_label.configure(image="", text=f"Preview not available\n{e}")
 
@@ -700,7 +926,42 @@ class PlantPhotoManager(TkinterDnD.Tk):
 
         fname, spec_code, feat_code, locc = gen_compact_filename(species, date_taken, main_feat, location, bool(used_topaz), os.path.basename(proc))
 
+        values = {
+            "species": species,
+            "species_code": spec_code,
+            "gfib_link": gfib,
+            "main_feature": main_feat,
+            "feature_code": feat_code,
+            "date_taken": date_taken,
+            "used_topaz": used_topaz,
+            "subject_size": subject_size,
+            "other_features": other,
+            "location": location,
+            "location_code": locc,
+            "processed_filename": fname,
+            "raw_attached": raw_attached,
+            "raw_mode": raw_mode,
+        }
+        # decoding the image for its dHash and scanning stored hashes run on the worker;
+        # only the duplicate prompt comes back to the Tk thread
+        self.save_btn.configure(state="disabled")
+        fut = self._copy_pool.submit(_hash_and_match, proc)
+        fut.add_done_callback(lambda f: self.after(0, self._save_checked, f, proc, values, raw_paths))
+
+    def _save_checked(self, fut, proc, values, raw_paths):
+        """Tk thread: confirm near-duplicates, then start copying the entry's files."""
+        try:
+            dhash, dup = fut.result()
+        except Exception:
+            dhash, dup = None, None
+        # warn before storing a near-duplicate of an existing photo
+        if dup and not messagebox.askyesno("Possible duplicate", f"This image looks like an existing entry:\n{dup}\n\nSave anyway?"):
+            self.save_btn.configure(state="normal")
+            return
+        values["dhash"] = dhash
+
         # copy processed file to PROCESSED_DIR with fname (avoid overwriting)
+        fname = values["processed_filename"]
         dest_proc = os.path.join(PROCESSED_DIR, fname)
         if os.path.exists(dest_proc):
             base, ext = os.path.splitext(fname)
@@ -709,88 +970,85 @@ class PlantPhotoManager(TkinterDnD.Tk):
                 suffix += 1
             fname = f"{base}-{suffix}{ext}"
             dest_proc = os.path.join(PROCESSED_DIR, fname)
-        try:
-            shutil.copy2(proc, dest_proc)
-        except Exception as e:
-            messagebox.showerror("Copy failed", f"Failed to copy processed image:\n{e}")
-            return
+        values["processed_filename"] = fname
+        values["processed_path"] = dest_proc
 
         # handle raw files: either copy into RAW_DIR or keep references
         handled_raw_paths = []
+        pending_copies = []
+        claimed = set()
+        prefix = safe_filename_prefix(values["species"])
         for rp in raw_paths:
             if not os.path.exists(rp):
                 # skip missing but alert
                 messagebox.showwarning("Raw missing", f"Raw file not found, skipping:\n{rp}")
                 continue
-            if raw_mode == "copied":
-                try:
-                    bn = os.path.basename(rp)
-                    prefix = safe_filename_prefix(species)
-                    dest_name = f"{prefix}_{datetime.datetime.now().strftime('%Y%m%d%H%M%S')}_{bn}"
-                    dest = os.path.join(RAW_DIR, dest_name)
-                    # ensure uniqueness
-                    if os.path.exists(dest):
-                        base, ext = os.path.splitext(dest)
-                        c = 1
-                        while os.path.exists(f"{base}_{c}{ext}"):
-                            c += 1
-                        dest = f"{base}_{c}{ext}"
-                    shutil.copy2(rp, dest)
-                    handled_raw_paths.append(dest)
-                except Exception as e:
-                    messagebox.showwarning("Raw copy warning", f"Failed to copy raw file {rp}:\n{e}")
-                    # fallback to storing reference
-                    handled_raw_paths.append(rp)
+            if values["raw_mode"] == "copied":
+                bn = os.path.basename(rp)
+                dest_name = f"{prefix}_{datetime.datetime.now().strftime('%Y%m%d%H%M%S')}_{bn}"
+                dest = os.path.join(RAW_DIR, dest_name)
+                # ensure uniqueness, including against copies still pending
+                if os.path.exists(dest) or dest in claimed:
+                    base, ext = os.path.splitext(dest)
+                    c = 1
+                    while os.path.exists(f"{base}_{c}{ext}") or f"{base}_{c}{ext}" in claimed:
+                        c += 1
+                    dest = f"{base}_{c}{ext}"
+                claimed.add(dest)
+                pending_copies.append((rp, dest))
             else:
                 handled_raw_paths.append(rp)
 
+        # copying (large RAW files especially) runs on a worker thread; the DB write
+        # and dialogs happen back on the Tk thread in _finish_save
+        fut = self._copy_pool.submit(_copy_entry_files, proc, dest_proc, pending_copies)
+        fut.add_done_callback(lambda f: self.after(0, self._finish_save, f, values, handled_raw_paths))
+
+    def _finish_save(self, fut, values, handled_raw_paths):
+        """Tk thread: record a saved entry once its files have been copied."""
+        self.save_btn.configure(state="normal")
+        try:
+            raw_results = fut.result()
+        except Exception as e:
+            messagebox.showerror("Copy failed", f"Failed to copy processed image:\n{e}")
+            return
+        for rp, result in raw_results:
+            if isinstance(result, Exception):
+                messagebox.showwarning("Raw copy warning", f"Failed to copy raw file {rp}:\n{result}")
+                # fallback to storing reference
+                handled_raw_paths.append(rp)
+            else:
+                handled_raw_paths.append(result)
+        dest_proc = values["processed_path"]
+        raw_mode = values["raw_mode"]
+
         # write to DB
-        conn = sqlite3.connect(DB_FILE)
-        c = conn.cursor()
-        c.execute('''
-            INSERT INTO photos (
-                species, species_code, gfib_link, main_feature, feature_code, date_taken,
-                used_topaz, subject_size, other_features, location, location_code,
-                processed_filename, processed_path, raw_attached, raw_paths, raw_mode, created_at
-            ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-        ''', (
-            species,
-            spec_code,
-            gfib,
-            main_feat,
-            feat_code,
-            date_taken,
-            used_topaz,
-            subject_size,
-            other,
-            location,
-            locc,
-            fname,
-            dest_proc,
-            raw_attached,
-            "|".join(handled_raw_paths),
-            raw_mode,
-            datetime.datetime.now().isoformat()
-        ))
-        conn.commit()
-        conn.close()
+        values.update({
+            "raw_paths": json.dumps(handled_raw_paths),
+            "created_at": datetime.datetime.now().isoformat(),
+        })
+        self._insert_photo_rows([values])
 
         messagebox.showinfo("Saved", f"Entry saved.\nProcessed file: {dest_proc}\nRaw files attached: {len(handled_raw_paths)} (mode: {raw_mode})")
         self.clear_add_form()
+        self.refresh_autocomplete()
         self.populate_db_view()
         self.populate_search_results()
 
     def clear_add_form(self):
-        self.proc_path_var.set("")
+        for var in self._form_text_vars:
+            var.set("")
+        self.topaz_var.set(0)
+        self.copy_raw_var.set(1)
         self.raw_listbox.delete(0, 'end')
+        self._raw_set.clear()
+        self.raw_files_text.config(state="normal")
         self.raw_files_text.delete("1.0", "end")
-        for var in ("species_var", "gfib_var", "feature_var", "date_var", "size_var", "other_var", "loc_var"):
-            getattr(self, var).set("")
-        self.topaz_var.set(0)
-        self.preview_var.set("")
+        self.raw_files_text.config(state="disabled")
+        self.cancel_thumbnail()
+        self._thumb_path = self._last_preview_key = None
         self.thumb_label.configure(image="", text="")
         self.note_preview.delete("1.0", "end")
-        self.copy_raw_var.set(1)
 
 # ---------------------
 # Search Tab
@@ -805,11 +1063,11 @@ class PlantPhotoManager(TkinterDnD.Tk):
         bottomfrm.pack(fill="x")
 
         # Filters
-        ttk.Label(topfrm, text="Species:").grid(row=0, column=0, sticky="w")
+        ttk.Label(topfrm, text="Species (abc* = starts with):").grid(row=0, column=0, sticky="w")
         self.s_search = tk.StringVar()
         ttk.Entry(topfrm, textvariable=self.s_search, width=20).grid(row=0, column=1, sticky="w", padx=4)
 
-        ttk.Label(topfrm, text="Feature:").grid(row=0, column=2, sticky="w")
+        ttk.Label(topfrm, text="Feature (abc* = starts with):").grid(row=0, column=2, sticky="w")
         self.f_search = tk.StringVar()
         ttk.Entry(topfrm, textvariable=self.f_search, width=20).grid(row=0, column=3, sticky="w", padx=4)
 
@@ -831,12 +1089,10 @@ class PlantPhotoManager(TkinterDnD.Tk):
         ttk.Button(topfrm, text="Reset", command=self.reset_search).grid(row=1, column=6, padx=6)
 
         # Results Treeview
-        cols = ("id", "species", "date_taken", "main_feature", "used_topaz", "processed_filename", "raw_attached", "raw_mode")
-        self.res_tree = ttk.Treeview(midfrm, columns=cols, show="headings", selectmode="browse")
-        widths = {"id":60, "species":160, "date_taken":100, "main_feature":120, "used_topaz":80, "processed_filename":260, "raw_attached":100, "raw_mode":100}
-        for c in cols:
+        self.res_tree = ttk.Treeview(midfrm, columns=RESULT_COLS, show="headings", selectmode="browse")
+        for c in RESULT_COLS:
             self.res_tree.heading(c, text=c.replace("_", " ").title())
-            self.res_tree.column(c, width=widths.get(c, 120), anchor="w")
+            self.res_tree.column(c, width=RESULT_COL_WIDTHS.get(c, 120), anchor="w")
         self.res_tree.pack(fill="both", expand=True)
         self.res_tree.bind("<Double-1>", self.open_selected_processed)
 
@@ -847,6 +1103,8 @@ class PlantPhotoManager(TkinterDnD.Tk):
         ttk.Button(bottomfrm, text="Open Processed", command=self.open_selected_processed).pack(side="right", padx=6)
         ttk.Button(bottomfrm, text="Open Raw Folder / Files", command=self.open_selected_raw_folder).pack(side="right", padx=6)
         ttk.Button(bottomfrm, text="Export Results CSV", command=self.export_search_csv).pack(side="right", padx=6)
+        self.load_more_btn = ttk.Button(bottomfrm, text="Load more", command=self.load_more_results, state="disabled")
+        self.load_more_btn.pack(side="right", padx=6)
 
     def reset_search(self):
         self.s_search.set("")
@@ -857,63 +1115,105 @@ class PlantPhotoManager(TkinterDnD.Tk):
         self.free_text.set("")
         self.populate_search_results()
 
-    def populate_search_results(self):
-        conn = sqlite3.connect(DB_FILE)
-        c = conn.cursor()
-        query = "SELECT id, species, date_taken, main_feature, used_topaz, processed_filename, raw_attached, raw_mode FROM photos WHERE 1=1"
-        params = []
-        if self.s_search.get().strip():
-            query += " AND species LIKE ?"
-            params.append(f"%{self.s_search.get().strip()}%")
-        if self.f_search.get().strip():
-            query += " AND main_feature LIKE ?"
-            params.append(f"%{self.f_search.get().strip()}%")
-        if self.topaz_search_var.get():
-            query += " AND used_topaz = 1"
-        if self.free_text.get().strip():
-            query += " AND other_features LIKE ?"
-            params.append(f"%{self.free_text.get().strip()}%")
+    def search_filters(self):
+        """Return the WHERE clause and named params for the current search tab filters."""
+        sp = self.s_search.get().strip()
+        fp = self.f_search.get().strip()
+        other = self.free_text.get().strip()
         df = self.date_from.get().strip()
         dt = self.date_to.get().strip()
-        if df:
-            try:
-                datetime.datetime.strptime(df, "%Y-%m-%d")
-                query += " AND date(date_taken) >= date(?)"
-                params.append(df)
-            except Exception:
-                pass
-        if dt:
+        # None marks an unused filter
+        params = {"sp": sp or None, "fp": fp or None, "ot": other or None, "fts": None}
+        if self._has_fts and len(other) >= FTS_MIN_TERM:
+            # quoted as one FTS phrase so the term is matched literally
+            params["ot"] = None
+            params["fts"] = '"' + other.replace('"', '""') + '"'
+        where = SQL_SEARCH_WHERE
+        if self.topaz_search_var.get():
+            where += SQL_TOPAZ_ONLY
+        if _is_iso_date(df):
+            params["df"] = df
+            where += SQL_DATE_FROM
+        if _is_iso_date(dt):
             try:
-                datetime.datetime.strptime(dt, "%Y-%m-%d")
-                query += " AND date(date_taken) <= date(?)"
-                params.append(dt)
-            except Exception:
+                # inclusive end date -> exclusive next day, so timestamps on dt still match
+                end = datetime.date.fromisoformat(dt) + datetime.timedelta(days=1)
+                params["dt_end"] = end.isoformat()
+                where += SQL_DATE_TO
+            except ValueError:
                 pass
+        for key, value, clause in (("sp", sp, SQL_SPECIES_PREFIX), ("fp", fp, SQL_FEATURE_PREFIX)):
+            # a trailing '*' is an explicit starts-with request
+            if not value.endswith("*"):
+                continue
+            prefix = value.rstrip("*").strip()
+            bounds = prefix_range(prefix) if "%" not in prefix else None
+            if bounds:
+                params[key] = None
+                params[key + "_lo"], params[key + "_hi"] = bounds
+                where += clause
+            else:
+                # no usable range (non-ASCII or wildcards): substring match on the prefix
+                params[key] = prefix or None
+        where += SQL_SEARCH_LIKES_FTS if self._has_fts else SQL_SEARCH_LIKES
+        return where, params
 
-        c.execute(query, params)
-        rows = c.fetchall()
-        conn.close()
-
-        for i in self.res_tree.get_children():
-            self.res_tree.delete(i)
-        for r in rows:
-            self.res_tree.insert("", "end", values=r)
+    def populate_search_results(self):
+        # freeze the filters so every page comes from the same query
+        self._search_query = self.search_filters()
+        self._search_offset = 0
+        # one Tcl call clears the tree
+        self.res_tree.delete(*self.res_tree.get_children())
+        self.load_more_results()
+
+    def load_more_results(self):
+        """Append the next SEARCH_PAGE_SIZE rows of the current search."""
+        where, params = self._search_query
+        c = self.conn.cursor()
+        c.execute(SQL_SEARCH_BASE + where + SQL_SEARCH_PAGE, dict(params, limit=SEARCH_PAGE_SIZE, offset=self._search_offset))
+        n = 0
+        insert = self.res_tree.insert
+        for r in c:
+            insert("", "end", values=tuple(r))
+            n += 1
+        self._search_offset += n
+        self.load_more_btn.configure(state="normal" if n == SEARCH_PAGE_SIZE else "disabled")
 
     def open_selected_processed(self, event=None):
-        sel = self.res_tree.selection()
+        self.open_processed_from(self.res_tree)
+
+    def open_processed_from(self, tree):
+        """Open the processed image for the row selected in a results tree."""
+        sel = tree.selection()
         if not sel:
             return
-        item = self.res_tree.item(sel[0])["values"]
+        item = tree.item(sel[0])["values"]
         if not item:
             return
-        pk = item[0]
-        conn = sqlite3.connect(DB_FILE)
-        c = conn.cursor()
-        c.execute("SELECT processed_path FROM photos WHERE id=?", (pk,))
-        row = c.fetchone()
-        conn.close()
-        if row:
-            open_path(row[0])
+        pk = int(item[0])
+        path = self._fetch_processed_paths([pk]).get(pk)
+        if path:
+            open_path(path)
+
+    def _fetch_processed_paths(self, ids):
+        """Return {id: processed_path} for ids, querying only uncached ids in one IN batch."""
+        cache = self._processed_path_cache
+        out = {}
+        missing = []
+        for pk in ids:
+            if pk in cache:
+                out[pk] = cache[pk] = cache.pop(pk)  # re-insert as most recent
+            else:
+                missing.append(pk)
+        # stay under SQLite's default host-parameter limit
+        for i in range(0, len(missing), 900):
+            chunk = missing[i:i + 900]
+            sql = SQL_GET_PROCESSED_PATHS.format(marks=",".join("?" * len(chunk)))
+            for row in self.conn.execute(sql, chunk):
+                out[row["id"]] = cache[row["id"]] = row["processed_path"]
+        while len(cache) > PROCESSED_PATH_CACHE_SIZE:
+            del cache[next(iter(cache))]
+        return out
 
     def open_selected_raw_folder(self):
         sel = self.res_tree.selection()
@@ -923,16 +1223,14 @@ class PlantPhotoManager(TkinterDnD.Tk):
         if not item:
             return
         pk = item[0]
-        conn = sqlite3.connect(DB_FILE)
-        c = conn.cursor()
-        c.execute("SELECT raw_paths, raw_mode FROM photos WHERE id=?", (pk,))
+        c = self.conn.cursor()
+        c.execute(SQL_GET_RAW_PATHS, (pk,))
         row = c.fetchone()
-        conn.close()
-        if not row or not row[0]:
+        raw_paths = decode_raw_paths(row["raw_paths"]) if row else []
+        if not raw_paths:
             messagebox.showinfo("No raw files", "No raw files attached for this entry.")
             return
-        raw_paths = row[0].split("|")
-        raw_mode = row[1] if row[1] else "referenced"
+        raw_mode = row["raw_mode"] or "referenced"
         if raw_mode == "copied":
             # open the folder containing the first raw copy
             folder = os.path.dirname(raw_paths[0])
@@ -950,51 +1248,33 @@ class PlantPhotoManager(TkinterDnD.Tk):
                                                  filetypes=[("CSV", "*.csv")])
         if not save_path:
             return
-        # build export list from the search query constraints
+        # read the Tk filter vars here, on the Tk thread; the worker only touches the DB and file
+        where, params = self.search_filters()
+        threading.Thread(target=self._export_query_and_write,
+                         args=(save_path, where, params), daemon=True).start()
+
+    def _export_query_and_write(self, save_path, where, params):
+        """Worker thread: stream the filtered rows to save_path and report back on the Tk thread."""
+        # own read connection, so the export never contends with the UI's cursor
         conn = sqlite3.connect(DB_FILE)
-        c = conn.cursor()
-        query = "SELECT * FROM photos WHERE 1=1"
-        params = []
-        if self.s_search.get().strip():
-            query += " AND species LIKE ?"
-            params.append(f"%{self.s_search.get().strip()}%")
-        if self.f_search.get().strip():
-            query += " AND main_feature LIKE ?"
-            params.append(f"%{self.f_search.get().strip()}%")
-        if self.topaz_search_var.get():
-            query += " AND used_topaz = 1"
-        if self.free_text.get().strip():
-            query += " AND other_features LIKE ?"
-            params.append(f"%{self.free_text.get().strip()}%")
-        df = self.date_from.get().strip()
-        dt = self.date_to.get().strip()
-        if df:
-            try:
-                datetime.datetime.strptime(df, "%Y-%m-%d")
-                query += " AND date(date_taken) >= date(?)"
-                params.append(df)
-            except Exception:
-                pass
-        if dt:
-            try:
-                datetime.datetime.strptime(dt, "%Y-%m-%d")
-                query += " AND date(date_taken) <= date(?)"
-                params.append(dt)
-            except Exception:
-                pass
-        c.execute(query, params)
-        rows = c.fetchall()
-        cols = [d[0] for d in c.description]
-        conn.close()
         try:
-            with open(save_path, "w", newline="", encoding="utf-8") as fh:
+            c = conn.execute(SQL_EXPORT_BASE + where, params)
+            n = 0
+            # 1 MiB file buffer: the csv writer's many small writes become few large ones
+            with open(save_path, "w", newline="", encoding="utf-8", buffering=EXPORT_BUFFER) as fh:
                 writer = csv.writer(fh)
-                writer.writerow(cols)
-                for r in rows:
-                    writer.writerow(r)
-            messagebox.showinfo("Exported", f"Exported {len(rows)} rows to:\n{save_path}")
+                writer.writerow(EXPORT_COLS)
+                # stream rows in batches straight into the C csv writer; the running
+                # count replaces materialising rows (or a COUNT(*) pass) for the dialog
+                for batch in iter(lambda: c.fetchmany(EXPORT_BATCH), []):
+                    writer.writerows(batch)
+                    n += len(batch)
+            self.after(0, lambda: messagebox.showinfo("Exported", f"Exported {n} rows to:\n{save_path}"))
         except Exception as e:
-            messagebox.showerror("Export failed", str(e))
+            msg = str(e)
+            self.after(0, lambda: messagebox.showerror("Export failed", msg))
+        finally:
+            conn.close()
 
 # ---------------------
 # DB View Tab
@@ -1006,69 +1286,221 @@ class PlantPhotoManager(TkinterDnD.Tk):
         top.pack(fill="x")
         bottom.pack(fill="both", expand=True)
         ttk.Button(top, text="Refresh", command=self.populate_db_view).pack(side="left")
-        ttk.Button(top, text="Compact DB (VACUUM)", command=self.vacuum_db).pack(side="left", padx=6)
+        ttk.Button(top, text="Compact DB", command=self.vacuum_db).pack(side="left", padx=6)
+        ttk.Button(top, text="Full VACUUM", command=self.full_vacuum_db).pack(side="left", padx=6)
         ttk.Button(top, text="Open processed folder", command=lambda: open_path(PROCESSED_DIR)).pack(side="left", padx=6)
         ttk.Button(top, text="Open raw folder", command=lambda: open_path(RAW_DIR)).pack(side="left", padx=6)
 
-        cols = ("id", "species", "date_taken", "main_feature", "used_topaz", "processed_filename", "raw_attached", "raw_mode")
-        self.db_tree = ttk.Treeview(bottom, columns=cols, show="headings")
-        widths = {"id":60, "species":160, "date_taken":100, "main_feature":120, "used_topaz":80, "processed_filename":260, "raw_attached":100, "raw_mode":100}
-        for c in cols:
+        self.db_tree = ttk.Treeview(bottom, columns=RESULT_COLS, show="headings")
+        for c in RESULT_COLS:
             self.db_tree.heading(c, text=c.replace("_", " ").title())
-            self.db_tree.column(c, width=widths.get(c, 130), anchor="w")
+            self.db_tree.column(c, width=RESULT_COL_WIDTHS.get(c, 130), anchor="w")
+        self.db_scroll = ttk.Scrollbar(bottom, orient="vertical", command=self.db_tree.yview)
+        self.db_tree.configure(yscrollcommand=self._db_tree_scrolled)
+        self.db_scroll.pack(side="right", fill="y")
         self.db_tree.pack(fill="both", expand=True)
         self.db_tree.bind("<Double-1>", self.db_open_processed)
+        self._db_offset = 0
+        self._db_more = False
 
     def populate_db_view(self):
-        conn = sqlite3.connect(DB_FILE)
-        c = conn.cursor()
-        c.execute("SELECT id, species, date_taken, main_feature, used_topaz, processed_filename, raw_attached, raw_mode FROM photos ORDER BY created_at DESC")
-        rows = c.fetchall()
-        conn.close()
-        for i in self.db_tree.get_children():
-            self.db_tree.delete(i)
-        for r in rows:
-            self.db_tree.insert("", "end", values=r)
+        # one Tcl call clears the tree
+        self.db_tree.delete(*self.db_tree.get_children())
+        self._db_offset = 0
+        self.load_more_db_view()
         # Also refresh search results
         self.populate_search_results()
 
+    def load_more_db_view(self):
+        """Append the next DB_VIEW_PAGE_SIZE rows to the database view."""
+        self._db_more = False
+        n = 0
+        # insert straight from the cursor; no full result list is materialised
+        insert = self.db_tree.insert
+        for r in self.conn.execute(SQL_DB_VIEW, (DB_VIEW_PAGE_SIZE, self._db_offset)):
+            n += 1
+            # iid is the row id, so rows are addressable without a search
+            try:
+                insert("", "end", iid=r["id"], values=tuple(r))
+            except tk.TclError:
+                # already listed: rows added since the last page shifted the offset
+                pass
+        self._db_offset += n
+        self._db_more = n == DB_VIEW_PAGE_SIZE
+
+    def _db_tree_scrolled(self, first, last):
+        self.db_scroll.set(first, last)
+        # fetch the next page once the view reaches the bottom
+        if self._db_more and float(last) >= 1.0:
+            self._db_more = False
+            self.after_idle(self.load_more_db_view)
+
     def db_open_processed(self, event=None):
-        sel = self.db_tree.selection()
-        if not sel:
-            return
-        item = self.db_tree.item(sel[0])["values"]
-        if not item:
-            return
-        pk = item[0]
-        conn = sqlite3.connect(DB_FILE)
-        c = conn.cursor()
-        c.execute("SELECT processed_path FROM photos WHERE id=?", (pk,))
-        row = c.fetchone()
-        conn.close()
-        if row:
-            open_path(row[0])
+        self.open_processed_from(self.db_tree)
 
     def vacuum_db(self):
-        conn = sqlite3.connect(DB_FILE)
-        c = conn.cursor()
-        c.execute("VACUUM")
-        conn.commit()
-        conn.close()
+        """Release up to VACUUM_PAGES free pages without rewriting the file."""
+        # freelist_count reads the file header, which refreshes the connection's cached
+        # copy; auto_vacuum alone can report a stale mode after full_vacuum_db converts it
+        before = self.conn.execute("PRAGMA freelist_count").fetchone()[0]
+        # incremental_vacuum is a no-op unless the file is in incremental mode (2);
+        # older databases need one full VACUUM to convert
+        if self.conn.execute("PRAGMA auto_vacuum").fetchone()[0] != 2:
+            if messagebox.askyesno("Vacuum", "This database does not support incremental compaction yet.\n"
+                                             "Run a full VACUUM now to convert it?"):
+                self.full_vacuum_db()
+            return
+        # executescript steps the pragma to completion; execute() would stop after one page
+        self.conn.executescript(f"PRAGMA incremental_vacuum({VACUUM_PAGES});")
+        after = self.conn.execute("PRAGMA freelist_count").fetchone()[0]
+        messagebox.showinfo("Vacuum", f"Released {before - after} free pages ({after} remaining).")
+
+    def full_vacuum_db(self):
+        """Rewrite the whole file; also switches older databases to incremental auto_vacuum."""
+        # VACUUM rewrites the whole file, so it gets its own short-lived connection
+        conn = sqlite3.connect(DB_FILE, isolation_level=None)
+        try:
+            conn.execute("PRAGMA auto_vacuum=INCREMENTAL")
+            conn.execute("VACUUM")
+        finally:
+            conn.close()
         messagebox.showinfo("Vacuum", "Database vacuumed.")
 
 # -------------------------
 # Misc helpers
 # -------------------------
+_NON_ALNUM_RUN_RE = re.compile(r'[^A-Za-z0-9]+')
+# byte table mapping every non-alphanumeric ASCII byte to '_'
+_NON_ALNUM_TABLE = bytes(c if chr(c).isalnum() and c < 128 else ord("_") for c in range(256))
+
 def safe_filename_prefix(s):
     s = s or "UNDEF"
-    s = re.sub(r'[^A-Za-z0-9]+', '_', s).strip('_')
+    if s.isascii():
+        if s.isalnum():
+            return s[:16]
+        # translate + split collapses '_' runs and trims the ends, like the regex
+        s = "_".join(filter(None, s.encode("ascii").translate(_NON_ALNUM_TABLE).decode("ascii").split("_")))
+    else:
+        s = _NON_ALNUM_RUN_RE.sub('_', s).strip('_')
     return s[:16]
 
+def decode_raw_paths(value):
+    """Return the raw_paths column as a list; rows saved before JSON used '|'."""
+    if not value:
+        return []
+    try:
+        paths = json.loads(value)
+    except ValueError:
+        paths = None
+    # a legacy path can itself parse as JSON (digits, "null"), so only accept a list
+    return paths if isinstance(paths, list) else value.split("|")
+
+def _is_iso_date(s):
+    """Cheap YYYY-MM-DD shape check, used instead of strptime to gate date filters."""
+    return (len(s) == 10 and s[4] == "-" and s[7] == "-"
+            and s[:4].isdigit() and s[5:7].isdigit() and s[8:].isdigit())
+
+def prefix_range(prefix):
+    """Return (lo, hi) such that lo <= s < hi under NOCASE exactly when s starts with prefix."""
+    # NOCASE only folds ASCII letters, so other input keeps the LIKE path
+    if not prefix or not prefix.isascii():
+        return None
+    lo = prefix.lower()
+    # the bound must be the next character in NOCASE's folded order: 'A'-'Z'
+    # fold to lower case, so '@' + 1 has to skip past them to '['
+    nxt = ord(lo[-1]) + 1
+    while 0x41 <= nxt <= 0x5A:
+        nxt += 1
+    return lo, lo[:-1] + chr(nxt)
+
+def find_similar_photo(conn, dhash, max_distance=DHASH_MAX_DISTANCE):
+    """Return the processed filename of a stored photo within max_distance bits of dhash."""
+    target = int(dhash, 16)
+    for fname, other in conn.execute(SQL_SIMILAR_CANDIDATES):
+        if bin(target ^ int(other, 16)).count("1") <= max_distance:
+            return fname
+    return None
+
+def _hash_and_match(proc):
+    """Worker thread: return (dhash, similar processed filename or None) for proc."""
+    try:
+        dhash = image_dhash(proc)
+    except Exception:
+        return None, None
+    # own read connection; the app connection stays on the Tk thread
+    conn = sqlite3.connect(DB_FILE)
+    try:
+        return dhash, find_similar_photo(conn, dhash)
+    finally:
+        conn.close()
+
+def _copy_entry_files(proc, dest_proc, raw_copies):
+    """Worker thread: copy the processed image, then the (src, dest) raw copies two at
+    a time. Returns [(src, dest or exception)]; a processed-copy failure raises."""
+    copy_file(proc, dest_proc)
+    with concurrent.futures.ThreadPoolExecutor(max_workers=2) as pool:
+        futures = [(rp, pool.submit(copy_file, rp, dest)) for rp, dest in raw_copies]
+    results = []
+    for rp, f in futures:
+        try:
+            results.append((rp, f.result()))
+        except Exception as e:
+            results.append((rp, e))
+    return results
+
+def exif_date_taken(path):
+    """Return the EXIF DateTimeOriginal of path as an ISO date, or None."""
+    try:
+        with Image.open(path) as img:
+            info = img._getexif() or {}
+        for tag, value in info.items():
+            if TAGS.get(tag, tag) == "DateTimeOriginal":
+                return datetime.datetime.strptime(value, "%Y:%m:%d %H:%M:%S").date().isoformat()
+    except Exception:
+        pass
+    return None
+
+def _import_raw_files(raw_copies):
+    """Worker thread: copy (src, dest) raw files two at a time and read their EXIF dates.
+    Returns [(src, dest or exception, date or None)]."""
+    def one(src, dest):
+        date_taken = exif_date_taken(src)
+        return copy_file(src, dest), date_taken
+    with concurrent.futures.ThreadPoolExecutor(max_workers=2) as pool:
+        futures = [(src, pool.submit(one, src, dest)) for src, dest in raw_copies]
+    results = []
+    for src, f in futures:
+        try:
+            results.append((src,) + f.result())
+        except Exception as e:
+            results.append((src, e, None))
+    return results
+
+def build_prefix_index(values):
+    """Return (lowercased, original) pairs sorted for bisect prefix lookups."""
+    return sorted((v.lower(), v) for v in values)
+
+def prefix_matches(index, prefix, limit=50):
+    """Return up to limit indexed values starting with prefix, ignoring case."""
+    p = prefix.lower()
+    start = bisect.bisect_left(index, (p,))
+    out = []
+    for key, value in index[start:start + limit]:
+        if not key.startswith(p):
+            break
+        out.append(value)
+    return out
+
 # -------------------------
 # Run
 # -------------------------
 def main():
-    init_db()
+    conn = sqlite3.connect(DB_FILE)
+    schema_bootstrap(conn)
+    # two small SELECTs; loaded before any window exists so the filename preview and
+    # the saved name always see the same codes
+    load_specific_mappings(conn)
+    conn.close()
     app = PlantPhotoManager()
     app.mainloop()
 